@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 from agent.llm_engine import LlmEngine
+from agent.mini_intent import MiniIntentClassifier
 
 
 @dataclass(frozen=True)
@@ -15,12 +16,58 @@ class Intent:
     chat_response: Optional[str] = None  # for chat: the generated response from the LLM
 
 
-_REPLY_RE = re.compile(r"\b(reply|respond)\b.*?\b(\d+)\b", re.IGNORECASE)
-_READ_LAST_N_RE = re.compile(
-    r"\b(?:fetch|get|show|read)\b.*?\b(?:last|latest)\b.*?\b(\d+)\b.*?\b(?:mail|mails|email|emails|message|messages)\b",
+# Single compiled scan for all argument-bearing intents. Each branch is an anchored lookahead so
+# "read last N" keeps precedence over "reply N" wherever they occur; dispatch on `m.lastgroup`.
+_COMBINED_RE = re.compile(
+    r"^(?:"
+    r"(?=(?s:.*?)(?P<read_n>\b(?:fetch|get|show|read)\b.*?\b(?:last|latest)\b.*?\b(?P<rn>\d+)\b.*?\b(?:mail|mails|email|emails|message|messages)\b))"
+    r"|(?=(?s:.*?)(?P<reply>\b(?:reply|respond)\b.*?\b(?P<ridx>\d+)\b))"
+    r")",
     re.IGNORECASE,
 )
 
+# Deterministic small-talk table: answered without waking the LLM.
+_GREETING_SET = frozenset({"hi", "hello", "hey", "yo", "sup", "good morning", "good evening"})
+_GREETING_RESPONSE = "Hi there! How can I help with your emails?"
+
+_NUM_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS_WORDS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50}
+_UNIT_WORDS = "|".join(w for w, n in _NUM_WORDS.items() if n < 10)
+# Only spell-outs in the slots `_COMBINED_RE` reads ("last two", "reply to message twenty-one"), so
+# "reply to the one from John" keeps its pronoun. Tens come first so compounds parse as one number.
+_NUM_WORD_RE = re.compile(
+    r"\b(?P<slot>(?:last|latest|reply|respond|message|number|email|mail)"
+    r"(?:\s+(?:to|message|number|email|mail|no\.?))*\s+)"
+    r"(?:(?P<tens>" + "|".join(_TENS_WORDS) + r")(?:[-\s](?P<unit>" + _UNIT_WORDS + r"))?"
+    r"|(?P<small>" + "|".join(_NUM_WORDS) + r"))\b",
+    re.IGNORECASE,
+)
+_NON_WORD_RE = re.compile(r"[^a-z ]+")
+
+
+def _number_word(m: re.Match[str]) -> str:
+    if m.group("small"):
+        n = _NUM_WORDS[m.group("small").lower()]
+    else:
+        n = _TENS_WORDS[m.group("tens").lower()]
+        if m.group("unit"):
+            n += _NUM_WORDS[m.group("unit").lower()]
+    return f"{m.group('slot')}{n}"
+
+
+def _normalize_numbers(text: str) -> str:
+    # "fetch the last two mails" -> "fetch the last 2 mails" (voice transcripts spell numbers out)
+    return _NUM_WORD_RE.sub(_number_word, text)
+
+
+def _is_greeting(low: str) -> bool:
+    return " ".join(_NON_WORD_RE.sub(" ", low).split()) in _GREETING_SET
+
 
 def detect_intent(text: str) -> Intent:
     t = (text or "").strip()
@@ -32,32 +79,20 @@ def detect_intent(text: str) -> Intent:
         return Intent(name="sign_out")
     if "help" in low or "what can you do" in low:
         return Intent(name="help")
+    if _is_greeting(low):
+        return Intent(name="chat", chat_response=_GREETING_RESPONSE)
 
+    t = _normalize_numbers(t)
+    low = t.lower()
+
+    m = _COMBINED_RE.match(t)
+    kind = m.lastgroup if m else None
+    if kind == "read_n":
+        return Intent(name="read_latest", max_results=int(m.group("rn")))
     if "read" in low or "latest" in low or "inbox" in low:
-        m = _READ_LAST_N_RE.search(t)
-        if m:
-            try:
-                return Intent(name="read_latest", max_results=int(m.group(1)))
-            except Exception:
-                return Intent(name="read_latest")
         return Intent(name="read_latest")
-
-    m = _READ_LAST_N_RE.search(t)
-    if m:
-        try:
-            return Intent(name="read_latest", max_results=int(m.group(1)))
-        except Exception:
-            return Intent(name="read_latest")
-
-    m = _REPLY_RE.search(t)
-    if m:
-        idx = int(m.group(2))
-        return Intent(name="reply_draft", message_index=idx)
-
-    # Fallback: "reply 2"
-    m2 = re.search(r"\breply\s+(\d+)\b", low)
-    if m2:
-        return Intent(name="reply_draft", message_index=int(m2.group(1)))
+    if kind == "reply":
+        return Intent(name="reply_draft", message_index=int(m.group("ridx")))
 
     return Intent(name="unknown")
 
@@ -66,15 +101,25 @@ class IntentDetector:
     """
     Hybrid intent detection:
     - fast rule-based pass
+    - optional mini classifier for argument-free intents
     - optional offline LLM fallback to produce structured args
     """
 
-    def __init__(self, llm: Optional[LlmEngine] = None) -> None:
+    def __init__(self, llm: Optional[LlmEngine] = None, mini: Optional[MiniIntentClassifier] = None) -> None:
         self.llm = llm
+        self.mini = mini
 
     def detect(self, text: str) -> Intent:
         base = detect_intent(text)
-        if base.name != "unknown" or self.llm is None:
+        if base.name != "unknown":
+            return base
+
+        if self.mini is not None:
+            pred = self.mini.predict(text)
+            if pred is not None:
+                return Intent(name=pred.name)
+
+        if self.llm is None:
             return base
 
         inferred = self.llm.infer_intent(text)
@@ -1,9 +1,67 @@
 from __future__ import annotations
 
+import copy
+import importlib.util
 import json
 import os
+import threading
 from dataclasses import dataclass
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+_INTENT_SYSTEM_PROMPT = (
+    "You are an intent classifier for a local Gmail voice assistant.\n"
+    "Return ONLY valid JSON. No extra text.\n"
+    "Supported intents:\n"
+    '- {"intent":"read_latest"} (Use when user wants to read, check, or fetch emails)\n'
+    '- {"intent":"read_latest","max_results":2}\n'
+    '- {"intent":"reply_draft","message_index":2} (Use when user wants to reply to a specific email)\n'
+    '- {"intent":"help"} (Use when user asks what they can do)\n'
+    '- {"intent":"sign_out"} (Use when user wants to log out)\n'
+    '- {"intent":"chat","chat_response":"Hello! How can I help?"} (CRITICAL: Use this for ANY greeting like "Hello", small talk, or conversational questions. Provide a short, friendly response.)\n'
+    '- {"intent":"unknown"} (Use for commands that are completely incomprehensible or unsupported)\n'
+    "Rules:\n"
+    "- message_index must be an integer if present.\n\n"
+    "- max_results must be an integer (1-20) if present.\n\n"
+    "- chat_response must be a short string if intent is chat.\n\n"
+    "Examples:\n"
+    'User: "Read my emails"\nJSON:\n{"intent":"read_latest"}\n\n'
+    'User: "Hello, how are you?"\nJSON:\n{"intent":"chat","chat_response":"I\'m doing great, thanks for asking! Need help with your emails?"}\n\n'
+    'User: "Reply to message 2"\nJSON:\n{"intent":"reply_draft","message_index":2}\n\n'
+    'User: "Hi"\nJSON:\n{"intent":"chat","chat_response":"Hi there! How can I assist you today?"}\n'
+)
+
+# Stand-in user turn used to split the rendered chat template into cacheable prefix/suffix.
+_UTTERANCE_SLOT = "\x00UTTERANCE\x00"
+
+# Decoder-only architectures whose generate() accepts a prefilled DynamicCache prefix.
+_PREFIX_CACHE_MODEL_TYPES = frozenset({"qwen2", "llama", "mistral"})
+
+# ONNX Runtime execution providers in order of preference.
+_ORT_PROVIDERS = (
+    "CUDAExecutionProvider",
+    "DmlExecutionProvider",
+    "OpenVINOExecutionProvider",
+    "CPUExecutionProvider",
+)
+
+# Subdirectory of the model folder holding the exported ONNX graph (qwen_accel = "onnx").
+_ONNX_SUBDIR = "onnx"
+
+_INTENT_NAMES = ("read_latest", "reply_draft", "help", "sign_out", "unknown", "chat")
+
+# JSON schema the intent decoder is constrained to (when a constrained-decoding library is installed).
+_INTENT_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": list(_INTENT_NAMES)},
+        "message_index": {"type": "integer"},
+        "max_results": {"type": "integer", "minimum": 1, "maximum": 20},
+        "chat_response": {"type": "string", "maxLength": 200},
+    },
+    "required": ["intent"],
+}
 
 
 @dataclass(frozen=True)
@@ -20,42 +78,97 @@ class LlmEngine:
     - If model cannot be loaded, falls back to a safe template drafter.
     """
 
-    def __init__(self, model_dir: str, temperature: float, max_new_tokens: int, max_input_chars: int) -> None:
+    def __init__(
+        self,
+        model_dir: str,
+        temperature: float,
+        max_new_tokens: int,
+        max_input_chars: int,
+        accel: str = "none",
+    ) -> None:
         self.model_dir = model_dir
         self.temperature = temperature
         self.max_new_tokens = max_new_tokens
         self.max_input_chars = max_input_chars
+        # Optional graph acceleration for the transformers backend: "none" | "compile" | "onnx"
+        self.accel = accel
 
         self._tokenizer = None
         self._model = None
+        self._llm = None
+        self._load_lock = threading.Lock()
+        self._intent_ids = None
+        # None = not built yet, False = unsupported for this model
+        self._intent_kv = None
+        self._intent_tok_data = None
+
+        # A GGUF file in model_dir selects the llama.cpp backend (hand-tuned CPU INT4 kernels),
+        # but only when llama-cpp-python is installed; otherwise stay on transformers quietly.
+        self._gguf_path = _find_gguf(model_dir) if importlib.util.find_spec("llama_cpp") else None
+        self._backend = "llamacpp" if self._gguf_path is not None else "hf"
 
         # Strongly discourage any network calls by transformers
         os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
         os.environ.setdefault("HF_HUB_OFFLINE", "1")
 
     def try_load(self) -> bool:
-        if self._model is not None:
+        if self._model is not None or self._llm is not None:
             return True
+        # Serialize loading: main.py preloads on a background thread while the REPL may call in.
+        with self._load_lock:
+            return self._load()
+
+    def _load(self) -> bool:
+        if self._model is not None or self._llm is not None:
+            return True
+        if self._backend == "llamacpp":
+            try:
+                from llama_cpp import Llama  # type: ignore
+
+                self._llm = Llama(
+                    model_path=str(self._gguf_path),
+                    n_ctx=2048,
+                    n_threads=os.cpu_count() or 4,
+                    verbose=False,
+                )
+                return True
+            except ImportError:
+                # Broken/partial llama-cpp-python install: same as not installed.
+                self._llm = None
+                self._backend = "hf"
+            except Exception as e:
+                print(f"[LLM] Failed to load GGUF model '{self._gguf_path}', using transformers: {e}")
+                self._llm = None
+                self._backend = "hf"
         try:
             from transformers import AutoModelForCausalLM, AutoTokenizer
             import torch
 
             tok = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True, trust_remote_code=True)
 
-            # bitsandbytes 4-bit may not be available on Windows; keep loading robust.
-            model = None
-            try:
-                from transformers import BitsAndBytesConfig  # type: ignore
+            # Pre-quantized GPTQ/AWQ checkpoints carry INT4 weights; never re-quantize them with bnb.
+            quant_method = _checkpoint_quant_method(self.model_dir)
+            model = self._load_prequantized(quant_method) if quant_method else None
+            if model is None and not quant_method and self.accel == "onnx":
+                model = self._load_onnx()
 
-                bnb = BitsAndBytesConfig(load_in_4bit=True)
-                model = AutoModelForCausalLM.from_pretrained(
-                    self.model_dir,
-                    local_files_only=True,
-                    trust_remote_code=True,
-                    quantization_config=bnb,
-                    device_map="auto",
-                )
-            except Exception:
+            if model is None and not quant_method:
+                # bitsandbytes 4-bit may not be available on Windows; keep loading robust.
+                try:
+                    from transformers import BitsAndBytesConfig  # type: ignore
+
+                    bnb = BitsAndBytesConfig(load_in_4bit=True)
+                    model = AutoModelForCausalLM.from_pretrained(
+                        self.model_dir,
+                        local_files_only=True,
+                        trust_remote_code=True,
+                        quantization_config=bnb,
+                        device_map="auto",
+                    )
+                except Exception:
+                    model = None
+
+            if model is None:
                 # Fallback to fp16 if available, else cpu fp32
                 dtype = torch.float16 if torch.cuda.is_available() else torch.float32
                 model = AutoModelForCausalLM.from_pretrained(
@@ -66,6 +179,11 @@ class LlmEngine:
                     device_map="auto" if torch.cuda.is_available() else None,
                 )
 
+            if self.accel == "compile" and isinstance(model, torch.nn.Module):
+                # Compile forward (not the module) so generate() dispatches into the fused graph.
+                # Compilation itself is lazy and happens on the first generate call.
+                model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+
             self._tokenizer = tok
             self._model = model
             return True
@@ -76,12 +194,90 @@ class LlmEngine:
             self._model = None
             return False
 
-    def draft_reply(self, email_from: str, subject: str, email_body: str) -> LlmResult:
+    def _load_prequantized(self, quant_method: str):
+        """
+        Load a GPTQ/AWQ INT4 checkpoint with its dedicated kernels.
+
+        Returns None if the matching library is not installed; transformers can still
+        load the checkpoint through its own GPTQ/AWQ integration in that case.
+        """
+        try:
+            if quant_method == "gptq":
+                from auto_gptq import AutoGPTQForCausalLM  # type: ignore
+
+                return AutoGPTQForCausalLM.from_quantized(
+                    self.model_dir,
+                    device_map="auto",
+                    use_safetensors=True,
+                    trust_remote_code=True,
+                )
+            if quant_method == "awq":
+                from awq import AutoAWQForCausalLM  # type: ignore
+
+                return AutoAWQForCausalLM.from_quantized(
+                    self.model_dir,
+                    fuse_layers=True,
+                    safetensors=True,
+                    trust_remote_code=True,
+                )
+        except Exception as e:
+            print(f"[LLM] {quant_method.upper()} loader unavailable, using transformers: {e}")
+        return None
+
+    def _load_onnx(self):
+        """
+        Load the checkpoint as an ONNX Runtime model via optimum.
+
+        The first run exports to `<model_dir>/onnx` and saves it there; later runs load that
+        directory directly. Picks the first available of CUDA, DirectML (Windows), OpenVINO, then CPU.
+        Returns None if optimum/onnxruntime are not installed or export fails.
+        """
+        try:
+            import onnxruntime  # type: ignore
+            from optimum.onnxruntime import ORTModelForCausalLM  # type: ignore
+
+            available = set(onnxruntime.get_available_providers())
+            provider = next((p for p in _ORT_PROVIDERS if p in available), "CPUExecutionProvider")
+            onnx_dir = Path(self.model_dir) / _ONNX_SUBDIR
+            if (onnx_dir / "model.onnx").exists():
+                return ORTModelForCausalLM.from_pretrained(
+                    onnx_dir,
+                    provider=provider,
+                    local_files_only=True,
+                    trust_remote_code=True,
+                )
+
+            # One-time export (minutes for 1.5B); cached so later starts skip it.
+            print(f"[LLM] Exporting '{self.model_dir}' to ONNX (one time) at '{onnx_dir}'...")
+            model = ORTModelForCausalLM.from_pretrained(
+                self.model_dir,
+                export=True,
+                provider=provider,
+                local_files_only=True,
+                trust_remote_code=True,
+            )
+            model.save_pretrained(onnx_dir)
+            return model
+        except Exception as e:
+            print(f"[LLM] ONNX Runtime backend unavailable, using transformers: {e}")
+            return None
+
+    def draft_reply(
+        self,
+        email_from: str,
+        subject: str,
+        email_body: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> LlmResult:
+        """
+        Draft a reply. If `on_token` is given, model output is also streamed to it piece by piece
+        as it is generated (the template fallback is not streamed); the full text is returned either way.
+        """
         # Safety: cap input size
         body = (email_body or "")[: self.max_input_chars]
         if self.try_load():
             try:
-                return LlmResult(text=self._draft_with_model(email_from, subject, body), used_model=True)
+                return LlmResult(text=self._draft_with_model(email_from, subject, body, on_token), used_model=True)
             except Exception:
                 # Model loaded but generation failed; fallback
                 pass
@@ -108,52 +304,15 @@ class LlmEngine:
             return None
 
     def _infer_intent_with_model(self, utterance: str) -> Optional[dict[str, Any]]:
-        assert self._model is not None and self._tokenizer is not None
-
-        system_prompt = (
-            "You are an intent classifier for a local Gmail voice assistant.\n"
-            "Return ONLY valid JSON. No extra text.\n"
-            "Supported intents:\n"
-            '- {"intent":"read_latest"} (Use when user wants to read, check, or fetch emails)\n'
-            '- {"intent":"read_latest","max_results":2}\n'
-            '- {"intent":"reply_draft","message_index":2} (Use when user wants to reply to a specific email)\n'
-            '- {"intent":"help"} (Use when user asks what they can do)\n'
-            '- {"intent":"sign_out"} (Use when user wants to log out)\n'
-            '- {"intent":"chat","chat_response":"Hello! How can I help?"} (CRITICAL: Use this for ANY greeting like "Hello", small talk, or conversational questions. Provide a short, friendly response.)\n'
-            '- {"intent":"unknown"} (Use for commands that are completely incomprehensible or unsupported)\n'
-            "Rules:\n"
-            "- message_index must be an integer if present.\n\n"
-            "- max_results must be an integer (1-20) if present.\n\n"
-            "- chat_response must be a short string if intent is chat.\n\n"
-            "Examples:\n"
-            'User: "Read my emails"\nJSON:\n{"intent":"read_latest"}\n\n'
-            'User: "Hello, how are you?"\nJSON:\n{"intent":"chat","chat_response":"I\'m doing great, thanks for asking! Need help with your emails?"}\n\n'
-            'User: "Reply to message 2"\nJSON:\n{"intent":"reply_draft","message_index":2}\n\n'
-            'User: "Hi"\nJSON:\n{"intent":"chat","chat_response":"Hi there! How can I assist you today?"}\n'
-        )
-        
         # Build chat messages for instruction-tuned models
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": utterance}
-        ]
-        prompt = self._tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        
-        import torch
-
-        inputs = self._tokenizer(prompt, return_tensors="pt")
-        if hasattr(self._model, "device"):
-            inputs = {k: v.to(self._model.device) for k, v in inputs.items()}
-        with torch.no_grad():
-            out = self._model.generate(
-                **inputs,
-                max_new_tokens=80,
-                temperature=0.0,
-                do_sample=False,
-                pad_token_id=getattr(self._tokenizer, "eos_token_id", None),
-            )
-
-        text = self._tokenizer.decode(out[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+        if self._backend == "llamacpp":
+            messages = [
+                {"role": "system", "content": _INTENT_SYSTEM_PROMPT},
+                {"role": "user", "content": utterance}
+            ]
+            text = self._generate_llamacpp(messages, max_tokens=80, temperature=0.0, json_schema=_INTENT_SCHEMA)
+        else:
+            text = self._generate_intent_hf(utterance)
         # Extract the first JSON object in output
         obj = _extract_first_json_object(text)
         if not obj:
@@ -162,7 +321,7 @@ class LlmEngine:
         if not isinstance(data, dict):
             return None
         intent = str(data.get("intent", "")).strip()
-        if intent not in {"read_latest", "reply_draft", "help", "sign_out", "unknown", "chat"}:
+        if intent not in _INTENT_NAMES:
             return None
         if intent == "reply_draft":
             mi = data.get("message_index")
@@ -176,9 +335,143 @@ class LlmEngine:
                 return None
         return data
 
-    def _draft_with_model(self, email_from: str, subject: str, email_body: str) -> str:
+    def _intent_prompt_ids(self):
+        """
+        Token ids of the intent chat template around the user turn, rendered once per model.
+
+        Only the utterance changes between calls, so the ~600-token system prompt is never
+        re-templated or re-tokenized after the first intent call.
+        """
+        if self._intent_ids is None:
+            messages = [
+                {"role": "system", "content": _INTENT_SYSTEM_PROMPT},
+                {"role": "user", "content": _UTTERANCE_SLOT},
+            ]
+            rendered = self._tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            prefix, suffix = rendered.split(_UTTERANCE_SLOT, 1)
+            self._intent_ids = (
+                self._tokenizer(prefix, return_tensors="pt", add_special_tokens=False)["input_ids"],
+                self._tokenizer(suffix, return_tensors="pt", add_special_tokens=False)["input_ids"],
+            )
+        return self._intent_ids
+
+    def _intent_prefix_cache(self):
+        """
+        KV cache for the intent prompt prefix, prefilled once and reused across turns.
+
+        generate() only prefills the tokens past the cached prefix, so each intent call pays
+        attention for the utterance (~10-20 tokens) rather than the whole system prompt.
+        Returns None for architectures where prefix reuse is not known to be safe.
+        """
+        if self._intent_kv is False:
+            return None
+        if self._intent_kv is None:
+            model_type = getattr(getattr(self._model, "config", None), "model_type", "")
+            if model_type not in _PREFIX_CACHE_MODEL_TYPES:
+                self._intent_kv = False
+                return None
+            try:
+                import torch
+                from transformers import DynamicCache
+
+                prefix_ids, _ = self._intent_prompt_ids()
+                if hasattr(self._model, "device"):
+                    prefix_ids = prefix_ids.to(self._model.device)
+                with torch.no_grad():
+                    self._intent_kv = self._model(
+                        input_ids=prefix_ids,
+                        past_key_values=DynamicCache(),
+                        use_cache=True,
+                    ).past_key_values
+            except Exception as e:
+                print(f"[LLM] Prompt prefix cache disabled: {e}")
+                self._intent_kv = False
+                return None
+        return self._intent_kv
+
+    def _intent_json_constraint(self):
+        """
+        Per-call token filter that only admits tokens keeping the output valid `_INTENT_SCHEMA` JSON.
+
+        Uses lm-format-enforcer (optional). The tokenizer vocabulary trie is built once and reused;
+        returns None when the library is missing so generation stays unconstrained.
+        """
+        if self._intent_tok_data is False:
+            return None
+        try:
+            from lmformatenforcer import JsonSchemaParser  # type: ignore
+            from lmformatenforcer.integrations.transformers import (  # type: ignore
+                build_token_enforcer_tokenizer_data,
+                build_transformers_prefix_allowed_tokens_fn,
+            )
+
+            if self._intent_tok_data is None:
+                self._intent_tok_data = build_token_enforcer_tokenizer_data(self._tokenizer)
+            return build_transformers_prefix_allowed_tokens_fn(self._intent_tok_data, JsonSchemaParser(_INTENT_SCHEMA))
+        except Exception:
+            self._intent_tok_data = False
+            return None
+
+    def _generate_intent_hf(self, utterance: str) -> str:
         assert self._model is not None and self._tokenizer is not None
 
+        import torch
+
+        prefix_ids, suffix_ids = self._intent_prompt_ids()
+        user_ids = self._tokenizer(utterance, return_tensors="pt", add_special_tokens=False)["input_ids"]
+        input_ids = torch.cat([prefix_ids, user_ids, suffix_ids], dim=1)
+        if hasattr(self._model, "device"):
+            input_ids = input_ids.to(self._model.device)
+
+        gen_kwargs: dict[str, Any] = {}
+        prefix_cache = self._intent_prefix_cache()
+        if prefix_cache is not None:
+            # generate() extends the cache in place; hand it a copy so the prefix stays reusable.
+            gen_kwargs["past_key_values"] = copy.deepcopy(prefix_cache)
+        allowed_tokens_fn = self._intent_json_constraint()
+        if allowed_tokens_fn is not None:
+            gen_kwargs["prefix_allowed_tokens_fn"] = allowed_tokens_fn
+        with torch.no_grad():
+            out = self._model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                max_new_tokens=80,
+                temperature=0.0,
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=getattr(self._tokenizer, "eos_token_id", None),
+                **gen_kwargs,
+            )
+
+        return self._tokenizer.decode(out[0][input_ids.shape[1]:], skip_special_tokens=True)
+
+    def _generate_llamacpp(
+        self,
+        messages: list[dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_schema: Optional[dict[str, Any]] = None,
+    ) -> str:
+        assert self._llm is not None
+        kwargs: dict[str, Any] = {}
+        if json_schema is not None:
+            # llama.cpp compiles the schema to a GBNF grammar and masks illegal tokens while decoding.
+            kwargs["response_format"] = {"type": "json_object", "schema": json_schema}
+        resp = self._llm.create_chat_completion(
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+        return resp["choices"][0]["message"].get("content") or ""
+
+    def _draft_with_model(
+        self,
+        email_from: str,
+        subject: str,
+        email_body: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
         prompt = (
             "You are a helpful assistant that drafts professional, friendly email replies.\n"
             "Rules:\n"
@@ -192,20 +485,68 @@ class LlmEngine:
             "Draft a reply:\n"
         )
 
+        if self._backend == "llamacpp":
+            # Chat completion returns only the generated turn, no prompt echo.
+            messages = [{"role": "user", "content": prompt}]
+            if on_token is None:
+                return self._generate_llamacpp(messages, self.max_new_tokens, self.temperature).strip()
+            pieces: list[str] = []
+            for chunk in self._llm.create_chat_completion(
+                messages=messages,
+                max_tokens=self.max_new_tokens,
+                temperature=self.temperature,
+                stream=True,
+            ):
+                piece = chunk["choices"][0]["delta"].get("content") or ""
+                if piece:
+                    pieces.append(piece)
+                    on_token(piece)
+            return "".join(pieces).strip()
+
+        assert self._model is not None and self._tokenizer is not None
+
         import torch
 
         inputs = self._tokenizer(prompt, return_tensors="pt")
         if hasattr(self._model, "device"):
             inputs = {k: v.to(self._model.device) for k, v in inputs.items()}
+        gen_kwargs = dict(
+            **inputs,
+            max_new_tokens=self.max_new_tokens,
+            temperature=self.temperature,
+            do_sample=True,
+            pad_token_id=getattr(self._tokenizer, "eos_token_id", None),
+        )
+
+        if on_token is not None:
+            from transformers import TextIteratorStreamer
+
+            # generate() runs on a worker thread and feeds decoded text through the streamer.
+            streamer = TextIteratorStreamer(self._tokenizer, skip_prompt=True, skip_special_tokens=True)
+            errors: list[Exception] = []
+
+            def _run() -> None:
+                try:
+                    with torch.no_grad():
+                        self._model.generate(**gen_kwargs, streamer=streamer)
+                except Exception as e:
+                    errors.append(e)
+                    streamer.end()
+
+            worker = threading.Thread(target=_run, name="llm-draft", daemon=True)
+            worker.start()
+            pieces = []
+            for piece in streamer:
+                if piece:
+                    pieces.append(piece)
+                    on_token(piece)
+            worker.join()
+            if errors:
+                raise errors[0]
+            return "".join(pieces).strip()
 
         with torch.no_grad():
-            out = self._model.generate(
-                **inputs,
-                max_new_tokens=self.max_new_tokens,
-                temperature=self.temperature,
-                do_sample=True,
-                pad_token_id=getattr(self._tokenizer, "eos_token_id", None),
-            )
+            out = self._model.generate(**gen_kwargs)
         text = self._tokenizer.decode(out[0], skip_special_tokens=True)
         # Return the part after the prompt
         if "Draft a reply:" in text:
@@ -213,6 +554,29 @@ class LlmEngine:
         return text.strip()
 
 
+def _find_gguf(model_dir: str) -> Optional[Path]:
+    root = Path(model_dir)
+    if not root.is_dir():
+        return None
+    found = sorted(root.glob("*.gguf"))
+    return found[0] if found else None
+
+
+def _checkpoint_quant_method(model_dir: str) -> str:
+    # Pre-quantized checkpoints declare their scheme in config.json (or AutoGPTQ's quantize_config.json)
+    root = Path(model_dir)
+    try:
+        cfg = json.loads((root / "config.json").read_text(encoding="utf-8"))
+        method = str((cfg.get("quantization_config") or {}).get("quant_method", "")).lower()
+        if method in {"gptq", "awq"}:
+            return method
+    except Exception:
+        pass
+    if (root / "quantize_config.json").exists():
+        return "gptq"
+    return ""
+
+
 def _extract_first_json_object(text: str) -> str:
     # naive but robust enough for small outputs
     start = text.find("{")
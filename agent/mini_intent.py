@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+"""
+Tiny TF-IDF + logistic-regression intent classifier.
+
+Sits between the regex rules and the Qwen fallback in `IntentDetector`: millisecond
+inference, no VRAM. Train and save the model (from project root):
+
+    python -m agent.mini_intent
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+# Labelled example utterances. Extend these (then re-run the module) to teach new phrasings.
+_EXAMPLES: dict[str, tuple[str, ...]] = {
+    "read_latest": (
+        "read my emails",
+        "check my inbox",
+        "any new mail",
+        "what's in my inbox",
+        "show me my messages",
+        "do I have new emails",
+        "open my mailbox",
+        "fetch my mail",
+        "list recent emails",
+        "check email",
+        "what did I get in my inbox today",
+        "anything new in gmail",
+        "show my emails",
+        "check for new mail",
+        "any emails for me",
+        "pull up my inbox",
+        "list my mails",
+        "did anyone email me",
+        "open my email",
+        "go through my inbox",
+        "got any mail",
+        "what's new in my email",
+        "load my inbox",
+        "let me see my emails",
+        "display my recent messages",
+        "check gmail",
+    ),
+    "reply_draft": (
+        "reply to the second one",
+        "respond to that email",
+        "write a reply",
+        "draft a response",
+        "answer the first message",
+        "reply to it",
+        "send a reply to him",
+        "respond to her email",
+    ),
+    "help": (
+        "what can you do",
+        "how does this work",
+        "show commands",
+        "what are my options",
+        "i need assistance",
+        "list the commands",
+        "how do i use this",
+        "what commands are there",
+        "what can i say",
+        "how do i use you",
+        "show me the commands",
+        "what are you able to do",
+        "which commands do you support",
+        "explain how this works",
+    ),
+    "sign_out": (
+        "log me out",
+        "sign me out",
+        "disconnect my account",
+        "log out of gmail",
+        "remove my account",
+        "forget my login",
+    ),
+    "chat": (
+        "how are you",
+        "thanks",
+        "thank you so much",
+        "good night",
+        "who are you",
+        "tell me a joke",
+        "what's up",
+        "nice to meet you",
+    ),
+    # Everything the classifier must not resolve: unsupported mail actions, filtered reads (the
+    # filter would be dropped), negations, and requests about other apps ("check my calendar").
+    "other": (
+        "delete my last email",
+        "forward email 2 to bob",
+        "archive that message",
+        "mark it as unread",
+        "move it to spam",
+        "star the first email",
+        "do not log me out",
+        "don't read my emails",
+        "compose a new email to alice",
+        "search for invoices",
+        "delete all emails",
+        "any mail from mom",
+        "emails from my boss",
+        "show unread emails from amazon",
+        "messages about the invoice",
+        "find the email from john",
+        "check my calendar",
+        "show my calendar",
+        "check my bank account",
+        "check messages on whatsapp",
+        "read my slack messages",
+        "show me my photos",
+        "open spotify",
+        "play some music",
+        "what's the weather",
+        "set a timer",
+        "what time is it",
+        "read me the news",
+        "send a text to john",
+        "check my notifications",
+        "open my files",
+        "show my contacts",
+    ),
+}
+
+_MODEL_PATH = Path("models") / "mini_intent.joblib"
+
+# Intents the classifier may resolve on its own; the rest need arguments/text only Qwen produces.
+# sign_out is destructive (deletes the token), so it is left to the explicit rules and the LLM.
+_STANDALONE_INTENTS = frozenset({"read_latest", "help"})
+
+# Char n-grams cannot see negation ("don't check my inbox"); defer those to the LLM.
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|don'?t|do\s+not|stop)\b", re.IGNORECASE)
+# read_latest only for utterances that name the mailbox, and without a sender/topic filter it would drop.
+_MAIL_WORD_RE = re.compile(r"\b(?:e-?mails?|mails?|inbox|mailbox|gmail|messages?)\b", re.IGNORECASE)
+_FILTER_RE = re.compile(r"\b(?:from|about|regarding|by|containing|on|in\s+slack|whatsapp)\b", re.IGNORECASE)
+
+# Held-out phrasings checked by `main()` before a model is saved: (utterance, expected or None).
+_SANITY_CASES: tuple[tuple[str, Optional[str]], ...] = (
+    ("show me everything in my inbox", "read_latest"),
+    ("any new emails", "read_latest"),
+    ("what commands do you have", "help"),
+    ("check my calendar", None),
+    ("check my calendar for today", None),
+    ("any mail from mom", None),
+    ("emails from the bank", None),
+    ("open my photos", None),
+    ("do not log me out", None),
+    ("log me out", None),
+    ("delete my last email", None),
+)
+
+
+@dataclass(frozen=True)
+class MiniPrediction:
+    name: str
+    confidence: float
+
+
+def build_pipeline():
+    from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
+    from sklearn.linear_model import LogisticRegression  # type: ignore
+    from sklearn.pipeline import FeatureUnion, Pipeline  # type: ignore
+
+    texts = [t for ts in _EXAMPLES.values() for t in ts]
+    labels = [name for name, ts in _EXAMPLES.items() for _ in ts]
+    pipe = Pipeline(
+        [
+            (
+                "tfidf",
+                FeatureUnion(
+                    [
+                        # Words carry the domain ("calendar" vs "inbox"); char n-grams absorb ASR typos.
+                        ("word", TfidfVectorizer(analyzer="word", ngram_range=(1, 2), sublinear_tf=True)),
+                        ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), sublinear_tf=True)),
+                    ]
+                ),
+            ),
+            # Weak regularization: with ~100 examples the default C=1 never gets past ~0.5 confidence.
+            ("clf", LogisticRegression(C=10.0, max_iter=2000)),
+        ]
+    )
+    pipe.fit(texts, labels)
+    return pipe
+
+
+class MiniIntentClassifier:
+    """
+    Optional fast intent classifier (scikit-learn).
+
+    Opt-in: `try_load` only loads a pipeline saved by `python -m agent.mini_intent` (which checks it
+    against held-out phrasings first); without that file the stage is skipped and nothing is
+    imported. main.py calls `try_load` at startup, off the REPL thread. `predict` never loads.
+    """
+
+    def __init__(self, model_path: Path = _MODEL_PATH, min_confidence: float = 0.6) -> None:
+        self.model_path = Path(model_path)
+        self.min_confidence = min_confidence
+        self._pipe = None  # None = not loaded yet, False = unavailable (don't retry)
+        self._load_lock = threading.Lock()
+
+    def try_load(self) -> bool:
+        with self._load_lock:
+            if self._pipe is None:
+                self._pipe = False
+                if self.model_path.exists():
+                    try:
+                        import joblib  # type: ignore
+
+                        self._pipe = joblib.load(self.model_path)
+                    except Exception as e:
+                        print(f"[intent] Mini classifier unavailable: {e}")
+            return self._pipe is not False
+
+    def predict(self, text: str) -> Optional[MiniPrediction]:
+        """
+        Returns a standalone intent if the classifier is confident enough, else None.
+        """
+        t = (text or "").strip()
+        if not t or not self._pipe:
+            return None
+        return _classify(self._pipe, t, self.min_confidence)
+
+
+def _classify(pipe, text: str, min_confidence: float) -> Optional[MiniPrediction]:
+    if _NEGATION_RE.search(text):
+        return None
+    probs = pipe.predict_proba([text])[0]
+    best = int(probs.argmax())
+    name = str(pipe.classes_[best])
+    confidence = float(probs[best])
+    if confidence < min_confidence or name not in _STANDALONE_INTENTS:
+        return None
+    if name == "read_latest" and (not _MAIL_WORD_RE.search(text) or _FILTER_RE.search(text)):
+        return None
+    return MiniPrediction(name=name, confidence=confidence)
+
+
+def main() -> None:
+    import joblib  # type: ignore
+
+    pipe = build_pipeline()
+    min_confidence = MiniIntentClassifier().min_confidence
+    failures = []
+    for text, expected in _SANITY_CASES:
+        pred = _classify(pipe, text, min_confidence)
+        got = pred.name if pred is not None else None
+        if got != expected:
+            failures.append(f"  {text!r}: expected {expected}, got {got}")
+    if failures:
+        raise SystemExit("Mini intent classifier failed its sanity check; not saved:\n" + "\n".join(failures))
+
+    _MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, _MODEL_PATH)
+    print(f"Mini intent classifier saved at: {_MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    main()
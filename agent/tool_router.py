@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import random
 import time
 from dataclasses import dataclass
 from typing import Callable, Optional, TypeVar
 
+from googleapiclient.errors import HttpError
+
 from tools.gmail_reader import EmailFull, EmailSummary, get_full_message, list_latest
 from tools.gmail_sender import SendResult, send_reply
 
 
 T = TypeVar("T")
 
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+_MAX_BACKOFF_S = 8.0
+
 
 @dataclass
 class RouterState:
@@ -19,27 +25,27 @@ class RouterState:
 
 
 def _with_backoff(fn: Callable[[], T], max_attempts: int = 4) -> T:
-    delay = 0.5
-    last_exc: Optional[Exception] = None
-    for _ in range(max_attempts):
+    # Retry only throttling/server errors; full jitter keeps concurrent callers from retrying in lockstep.
+    for attempt in range(max_attempts):
         try:
             return fn()
-        except Exception as e:
-            last_exc = e
-            time.sleep(delay)
-            delay *= 2
-    assert last_exc is not None
-    raise last_exc
+        except HttpError as e:
+            if e.resp.status not in _RETRYABLE_STATUS or attempt == max_attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(_MAX_BACKOFF_S, 0.5 * 2**attempt)))
+    raise AssertionError("unreachable")
 
 
-def gmail_list_latest(service, max_results: int, query: str) -> list[EmailSummary]:
-    return _with_backoff(lambda: list_latest(service, max_results=max_results, query=query))
+def gmail_list_latest(service, max_results: int, query: str, lightweight: bool = False) -> list[EmailSummary]:
+    return _with_backoff(
+        lambda: list_latest(service, max_results=max_results, query=query, lightweight=lightweight)
+    )
 
 
 def gmail_get_full(service, message_id: str) -> EmailFull:
     return _with_backoff(lambda: get_full_message(service, message_id=message_id))
 
 
-def gmail_send_reply(service, original: EmailFull, reply_text: str) -> SendResult:
-    return _with_backoff(lambda: send_reply(service, original=original, reply_text=reply_text))
+def gmail_send_reply(service, original: EmailFull, reply_text: str, messages=None) -> SendResult:
+    return _with_backoff(lambda: send_reply(service, original=original, reply_text=reply_text, messages=messages))
 
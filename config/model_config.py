@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -10,6 +11,12 @@ class ModelConfig:
     qwen_model_dir: Path = Path("models") / "qwen2.5-1.5b-instruct"
     # Use "base" or "small" for auto-download on first use; or a path like "models/whisper" for offline.
     whisper_model: str = "base"
+    # CTranslate2 compute type for faster-whisper ("int8" is fastest on CPU; "float16" on CUDA).
+    whisper_compute_type: str = "int8"
+
+    # Optional graph acceleration for the transformers backend:
+    # "none", "compile" (torch.compile) or "onnx" (optimum + onnxruntime).
+    qwen_accel: str = "none"
 
     # Generation
     temperature: float = 0.4
@@ -18,3 +25,8 @@ class ModelConfig:
     # VRAM safety
     max_input_chars: int = 6000
 
+
+@functools.cache
+def get_model_config() -> ModelConfig:
+    """Process-wide ModelConfig (frozen, so one shared instance is safe)."""
+    return ModelConfig()
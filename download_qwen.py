@@ -6,14 +6,47 @@ Utility script to download a local Qwen chat model into the `models/` folder.
 Usage (from project root, with venv activated):
 
     python download_qwen.py
+
+Pass `--quant gptq` (needs auto-gptq / optimum, usually a CUDA GPU) or `--quant awq` (needs
+autoawq) to fetch a pre-quantized INT4 checkpoint instead of the default fp16 weights.
+Pass `--gguf` to also fetch the Q4_K_M GGUF (~1 GB) for the llama.cpp backend (needs llama-cpp-python).
 """
 
-from huggingface_hub import snapshot_download
+import argparse
+import importlib.util
+import os
+
+# Rust multi-connection downloader; must be enabled before huggingface_hub is imported,
+# and only when installed (huggingface_hub errors out if the flag is set without it).
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+from huggingface_hub import hf_hub_download, snapshot_download  # noqa: E402
+
+
+_QUANT_REPOS = {
+    "gptq": "Qwen/Qwen2.5-1.5B-Instruct-GPTQ-Int4",
+    "awq": "Qwen/Qwen2.5-1.5B-Instruct-AWQ",
+}
 
 
 def main() -> None:
-    # Hugging Face model repo ID
-    repo_id = "Qwen/Qwen2.5-1.5B-Instruct"
+    parser = argparse.ArgumentParser(description="Download the local Qwen model into models/.")
+    parser.add_argument(
+        "--quant",
+        choices=sorted(_QUANT_REPOS),
+        default=None,
+        help="download a pre-quantized INT4 checkpoint instead of the fp16 weights",
+    )
+    parser.add_argument(
+        "--gguf",
+        action="store_true",
+        help="also download the Q4_K_M GGUF for the llama.cpp backend (needs llama-cpp-python)",
+    )
+    args = parser.parse_args()
+
+    # Hugging Face model repo ID (fp16 by default; loads anywhere transformers runs, CPU included)
+    repo_id = _QUANT_REPOS[args.quant] if args.quant else "Qwen/Qwen2.5-1.5B-Instruct"
 
     # Local path where the model will be stored
     local_dir = "models/qwen2.5-1.5b-instruct"
@@ -23,7 +56,22 @@ def main() -> None:
         repo_id=repo_id,
         local_dir=local_dir,
         local_dir_use_symlinks=False,  # better for Windows
+        # Weights as safetensors + config/tokenizer only; skip duplicate .bin/.pt/etc. exports.
+        allow_patterns=["*.safetensors", "*.json", "tokenizer*", "merges.txt", "*.tiktoken"],
+        ignore_patterns=["*.bin", "*.pt", "*.msgpack", "*.h5"],
+        max_workers=8,
     )
+
+    if args.gguf:
+        # Q4_K_M GGUF for the llama.cpp backend (picked up automatically when llama-cpp-python is installed)
+        gguf_repo_id = "Qwen/Qwen2.5-1.5B-Instruct-GGUF"
+        gguf_file = "qwen2.5-1.5b-instruct-q4_k_m.gguf"
+        print(f"Downloading '{gguf_repo_id}/{gguf_file}' to '{local_dir}'...")
+        hf_hub_download(
+            repo_id=gguf_repo_id,
+            filename=gguf_file,
+            local_dir=local_dir,
+        )
     print("Download complete.")
     print(f"Model saved at: {local_dir}")
 
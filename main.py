@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Optional
 
-from agent.intent_detector import IntentDetector
+from agent.intent_detector import IntentDetector, detect_intent
 from agent.llm_engine import LlmEngine
+from agent.mini_intent import MiniIntentClassifier
 from agent.tool_router import RouterState, gmail_get_full, gmail_list_latest, gmail_send_reply
 from config.gmail_config import GmailConfig
-from config.model_config import ModelConfig
+from config.model_config import get_model_config
 from tools.gmail_auth import get_gmail_service, sign_out
 from utils.logger import Logger, log_event
 
@@ -27,7 +31,7 @@ def _print_help() -> None:
 def main() -> None:
     logger = Logger().build()
     gmail_cfg = GmailConfig()
-    model_cfg = ModelConfig()
+    model_cfg = get_model_config()
 
     try:
         service = get_gmail_service(gmail_cfg)
@@ -45,9 +49,9 @@ def main() -> None:
     ptt = None
     try:
         from voice.push_to_talk import AudioCaptureConfig, PushToTalk
-        from voice.stt import SpeechToText
+        from voice.stt import SpeechToText, StreamingTranscriber
 
-        stt = SpeechToText(model=model_cfg.whisper_model)
+        stt = SpeechToText(model=model_cfg.whisper_model, compute_type=model_cfg.whisper_compute_type)
         ptt = PushToTalk(AudioCaptureConfig())
     except Exception as e:
         log_event(logger, "voice_disabled", reason=str(e))
@@ -57,13 +61,22 @@ def main() -> None:
         temperature=model_cfg.temperature,
         max_new_tokens=model_cfg.max_new_tokens,
         max_input_chars=model_cfg.max_input_chars,
+        accel=model_cfg.qwen_accel,
     )
-    intent_detector = IntentDetector(llm=llm)
+    mini = MiniIntentClassifier()
+    intent_detector = IntentDetector(llm=llm, mini=mini)
 
-    print("Pre-loading local LLM... this ensures instant replies during voice interaction.")
-    llm.try_load()
+    # Import torch/transformers and load weights while the user is still speaking the first command.
+    threading.Thread(target=llm.try_load, name="llm-preload", daemon=True).start()
+    if stt is not None:
+        # Whisper too, so the first push-to-talk turn doesn't wait on (or race) the model load.
+        threading.Thread(target=stt.try_load, name="whisper-preload", daemon=True).start()
+    # Same for the mini classifier (only if built with `python -m agent.mini_intent`).
+    threading.Thread(target=mini.try_load, name="mini-intent-preload", daemon=True).start()
 
     state = RouterState(latest=[])
+    # Speculative inbox listing while the LLM infers intent (one worker: `service` is not thread-safe).
+    prefetch_pool = ThreadPoolExecutor(max_workers=1)
 
     print("Local Gmail Voice Agent (V1)")
     _print_help()
@@ -82,10 +95,15 @@ def main() -> None:
         transcript = ""
         if ptt is not None and stt is not None:
             try:
-                got_audio = ptt.record_while_held(wav_path)
+                # Partial transcripts are printed while the key is still held.
+                live = StreamingTranscriber(stt, on_partial=lambda text: print(f"[voice] ... {text}"))
+                try:
+                    got_audio = ptt.record_while_held(wav_path, on_audio=live.feed)
+                finally:
+                    live.stop()
                 if got_audio:
                     print("[voice] Captured audio; transcribing with Whisper...")
-                    stt_res = stt.transcribe_wav(str(wav_path))
+                    stt_res = live.finish(str(wav_path), audio=ptt.last_audio)
                     raw_transcript = (stt_res.text or "").strip()
                     if not raw_transcript:
                         print("[voice] Didn't catch anything. Please try again or type your command.")
@@ -121,7 +139,21 @@ def main() -> None:
         if transcript.lower() in {"q", "quit", "exit"}:
             break
 
+        prefetch: Optional[Future] = None
+        if intent_detector.llm is not None and detect_intent(transcript).name == "unknown":
+            # Rules didn't match, so the slow LLM fallback will run: list the inbox in the meantime.
+            prefetch = prefetch_pool.submit(
+                gmail_list_latest, service, gmail_cfg.list_max_results, gmail_cfg.list_query
+            )
+
         intent = intent_detector.detect(transcript)
+        if prefetch is not None and not (
+            intent.name == "read_latest"
+            and (intent.max_results or gmail_cfg.list_max_results) == gmail_cfg.list_max_results
+        ):
+            # Discard, but let it finish before `service` is used again on this thread.
+            wait([prefetch])
+            prefetch = None
         log_event(
             logger,
             "intent",
@@ -147,7 +179,10 @@ def main() -> None:
         if intent.name == "read_latest":
             try:
                 max_results = intent.max_results or gmail_cfg.list_max_results
-                state.latest = gmail_list_latest(service, max_results, gmail_cfg.list_query)
+                if prefetch is not None:
+                    state.latest = prefetch.result()
+                else:
+                    state.latest = gmail_list_latest(service, max_results, gmail_cfg.list_query)
                 if not state.latest:
                     print("No messages found.")
                     continue
@@ -178,18 +213,32 @@ def main() -> None:
                 print(f"Error fetching email: {e}")
                 continue
 
+            print("\n--- DRAFT REPLY (not sent) ---")
+            # Model output is printed as it is generated; the template fallback is printed whole.
+            streamed = False
+
+            def _print_piece(piece: str) -> None:
+                nonlocal streamed
+                streamed = True
+                print(piece, end="", flush=True)
+
             draft = llm.draft_reply(
                 email_from=state.selected.from_,
                 subject=state.selected.subject,
                 email_body=state.selected.body_text,
+                on_token=_print_piece,
             )
             state.draft = draft.text
-            print("\n--- DRAFT REPLY (not sent) ---")
             if draft.used_model:
-                print("[Info] Drafted with local Qwen model.\n")
+                print("\n\n[Info] Drafted with local Qwen model.")
+            elif streamed:
+                # Generation failed partway: what was printed above is not the draft.
+                print("\n\n[Info] Model generation failed; discarding the partial draft above.")
+                print("[Info] Fallback template used.\n")
+                print(state.draft)
             else:
-                print("[Info] Fallback template used (model not loaded).\n")
-            print(state.draft)
+                print("\n[Info] Fallback template used (model unavailable or generation failed).\n")
+                print(state.draft)
             print("--- END DRAFT ---\n")
 
             confirm = input("Send this reply now? (y/N): ").strip().lower()
@@ -208,6 +257,8 @@ def main() -> None:
 
         print("Sorry, I didn't understand. Say 'help' for examples.")
 
+    prefetch_pool.shutdown(wait=False)
+
 
 if __name__ == "__main__":
     main()
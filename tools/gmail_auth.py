@@ -49,7 +49,9 @@ def get_gmail_service(cfg: GmailConfig):
         _ensure_parent_dir(token_path)
         token_path.write_text(creds.to_json(), encoding="utf-8")
 
-    return build("gmail", "v1", credentials=creds, cache_discovery=False)
+    # Bundled discovery document. This is already build()'s default without a discoveryServiceUrl;
+    # spelled out so it stays pinned.
+    return build("gmail", "v1", credentials=creds, cache_discovery=False, static_discovery=True)
 
 
 def sign_out(cfg: GmailConfig) -> bool:
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-import base64
+import asyncio
+import binascii
+from collections import deque
 from dataclasses import dataclass
 from typing import Any, Optional
 
 
+_GMAIL_MESSAGE_URL = "https://gmail.googleapis.com/gmail/v1/users/me/messages/{id}"
+_METADATA_HEADERS = ("From", "Subject", "Date")
+_METADATA_FIELDS = "id,threadId,snippet,payload/headers"
+_URLSAFE_TO_STD = bytes.maketrans(b"-_", b"+/")
+
+
 @dataclass(frozen=True)
 class EmailSummary:
     id: str
@@ -36,41 +44,119 @@ def _header(headers: list[dict[str, str]], name: str) -> str:
     return ""
 
 
-def list_latest(service, max_results: int, query: str) -> list[EmailSummary]:
+def list_latest(service, max_results: int, query: str, lightweight: bool = False) -> list[EmailSummary]:
+    """
+    List the latest messages matching `query`.
+
+    With `lightweight=True` only the ids from `messages.list` are returned (from/subject/date/snippet
+    empty), skipping the per-message metadata fetch. Enough for callers that go on to
+    `get_full_message` anyway.
+    """
     resp = (
         service.users()
         .messages()
-        .list(userId="me", maxResults=max_results, q=query)
+        .list(userId="me", maxResults=max_results, q=query, fields="messages(id,threadId)")
         .execute()
     )
     msgs = resp.get("messages", []) or []
+    if not msgs:
+        return []
+    if lightweight:
+        return [
+            EmailSummary(id=m.get("id", ""), thread_id=m.get("threadId", ""), from_="", subject="", date="", snippet="")
+            for m in msgs
+        ]
+
+    ids = [m["id"] for m in msgs]
+    if len(ids) > 2:
+        fetched = _get_metadata_async(service, ids)
+        if fetched is not None:
+            return [_to_summary(msg) for msg in fetched]
+    return [_to_summary(msg) for msg in _get_metadata_batch(service, ids)]
+
+
+def _to_summary(msg: dict[str, Any]) -> EmailSummary:
+    headers = (msg.get("payload") or {}).get("headers") or []
+    return EmailSummary(
+        id=msg.get("id", ""),
+        thread_id=msg.get("threadId", ""),
+        from_=_header(headers, "From"),
+        subject=_header(headers, "Subject"),
+        date=_header(headers, "Date"),
+        snippet=msg.get("snippet", ""),
+    )
+
+
+def _get_metadata_batch(service, ids: list[str]) -> list[dict[str, Any]]:
+    # One multipart HTTP round trip for all metadata gets instead of one per message.
+    results: dict[str, dict[str, Any]] = {}
+    errors: list[Exception] = []
+
+    def _on_response(request_id: str, response: dict[str, Any], exception: Optional[Exception]) -> None:
+        if exception is not None:
+            errors.append(exception)
+        else:
+            results[request_id] = response
 
-    out: list[EmailSummary] = []
-    for m in msgs:
-        msg_id = m["id"]
-        msg = (
+    batch = service.new_batch_http_request(callback=_on_response)
+    for i, msg_id in enumerate(ids):
+        batch.add(
             service.users()
             .messages()
             .get(
                 userId="me",
                 id=msg_id,
                 format="metadata",
-                metadataHeaders=["From", "Subject", "Date"],
-                fields="id,threadId,snippet,payload/headers",
-            )
-            .execute()
+                metadataHeaders=list(_METADATA_HEADERS),
+                fields=_METADATA_FIELDS,
+            ),
+            request_id=str(i),
         )
-        headers = (msg.get("payload") or {}).get("headers") or []
-        out.append(
-            EmailSummary(
-                id=msg.get("id", ""),
-                thread_id=msg.get("threadId", ""),
-                from_=_header(headers, "From"),
-                subject=_header(headers, "Subject"),
-                date=_header(headers, "Date"),
-                snippet=msg.get("snippet", ""),
-            )
+    batch.execute()
+    if errors:
+        raise errors[0]
+    return [results[str(i)] for i in range(len(ids)) if str(i) in results]
+
+
+def _get_metadata_async(service, ids: list[str]) -> Optional[list[dict[str, Any]]]:
+    """
+    Fetch message metadata with concurrent REST calls over one httpx.AsyncClient.
+
+    Best-effort: returns None (caller falls back to the batch request) if httpx is not installed,
+    the service's credentials are not usable as-is, or any request fails.
+    """
+    try:
+        import httpx  # type: ignore  # noqa: F401
+    except ImportError:
+        return None
+    creds = getattr(getattr(service, "_http", None), "credentials", None)
+    if creds is None or not getattr(creds, "valid", False) or not getattr(creds, "token", None):
+        return None
+    try:
+        return asyncio.run(_fetch_metadata(creds.token, ids))
+    except Exception:
+        return None
+
+
+async def _fetch_metadata(token: str, ids: list[str]) -> list[dict[str, Any]]:
+    import httpx  # type: ignore
+
+    params = [("format", "metadata"), ("fields", _METADATA_FIELDS)]
+    params += [("metadataHeaders", h) for h in _METADATA_HEADERS]
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        client = httpx.AsyncClient(http2=True, timeout=30.0)
+    except ImportError:
+        # http2 needs the optional `h2` package; HTTP/1.1 still runs the gets concurrently.
+        client = httpx.AsyncClient(timeout=30.0)
+    async with client:
+        responses = await asyncio.gather(
+            *[client.get(_GMAIL_MESSAGE_URL.format(id=msg_id), params=params, headers=headers) for msg_id in ids]
         )
+    out: list[dict[str, Any]] = []
+    for r in responses:
+        r.raise_for_status()
+        out.append(r.json())
     return out
 
 
@@ -100,58 +186,37 @@ def get_full_message(service, message_id: str) -> EmailFull:
 
 
 def _extract_best_text(payload: dict[str, Any]) -> str:
-    # Prefer text/plain; fallback to first decodable part; fallback empty.
+    # Prefer text/plain; fallback to any text/*; fallback to first decodable part; fallback empty.
     parts = payload.get("parts")
     if not parts:
         return _decode_body(payload.get("body"))
 
-    plain = _find_part(parts, "text/plain")
-    if plain is not None:
-        return _decode_body((plain.get("body") or {}))
-
-    # try any text/* part
-    any_text = _find_part_prefix(parts, "text/")
-    if any_text is not None:
-        return _decode_body((any_text.get("body") or {}))
+    # Single iterative pre-order walk of the MIME tree (same part order as a recursive scan).
+    first_text: Optional[dict[str, Any]] = None
+    with_data: list[dict[str, Any]] = []
+    dq: deque[dict[str, Any]] = deque(parts)
+    while dq:
+        p = dq.popleft()
+        mt = p.get("mimeType") or ""
+        if mt == "text/plain":
+            return _decode_body(p.get("body") or {})
+        if first_text is None and mt.startswith("text/"):
+            first_text = p
+        if (p.get("body") or {}).get("data"):
+            with_data.append(p)
+        sub = p.get("parts")
+        if sub:
+            dq.extendleft(reversed(sub))
 
-    # fallback to first part with data
-    for p in parts:
+    if first_text is not None:
+        return _decode_body(first_text.get("body") or {})
+    for p in with_data:
         text = _decode_body(p.get("body"))
         if text.strip():
             return text
-        subparts = p.get("parts") or []
-        if subparts:
-            text2 = _extract_best_text({"parts": subparts})
-            if text2.strip():
-                return text2
     return ""
 
 
-def _find_part(parts: list[dict[str, Any]], mime_type: str) -> Optional[dict[str, Any]]:
-    for p in parts:
-        if p.get("mimeType") == mime_type:
-            return p
-        sub = p.get("parts") or []
-        if sub:
-            found = _find_part(sub, mime_type)
-            if found is not None:
-                return found
-    return None
-
-
-def _find_part_prefix(parts: list[dict[str, Any]], prefix: str) -> Optional[dict[str, Any]]:
-    for p in parts:
-        mt = p.get("mimeType") or ""
-        if mt.startswith(prefix):
-            return p
-        sub = p.get("parts") or []
-        if sub:
-            found = _find_part_prefix(sub, prefix)
-            if found is not None:
-                return found
-    return None
-
-
 def _decode_body(body: Optional[dict[str, Any]]) -> str:
     if not body:
         return ""
@@ -159,7 +224,8 @@ def _decode_body(body: Optional[dict[str, Any]]) -> str:
     if not data:
         return ""
     try:
-        raw = base64.urlsafe_b64decode(data.encode("utf-8"))
+        # Map urlsafe alphabet in one C-level pass; a2b_base64 ignores surplus padding.
+        raw = binascii.a2b_base64(data.encode("ascii").translate(_URLSAFE_TO_STD) + b"==")
         return raw.decode("utf-8", errors="replace")
     except Exception:
         return ""
@@ -1,49 +1,143 @@
 from __future__ import annotations
 
 import base64
+import quopri
 import re
 from dataclasses import dataclass
-from email.mime.text import MIMEText
+from email.header import Header
 from email.utils import parseaddr
+from functools import lru_cache
+from typing import Optional
 
 from tools.gmail_reader import EmailFull
 
 
+# "fwd" before "fw" so the longer prefix wins.
+_REPLY_PREFIXES = ("re", "fwd", "fw")
+
+# RFC 5322: lines SHOULD stay within 78 chars and MUST NOT exceed 998 (excluding CRLF).
+_FOLD_WIDTH = 78
+_MAX_LINE_BYTES = 998
+# Leading whitespace + word (or trailing whitespace): the units `_fold` breaks between.
+_FOLD_TOKEN_RE = re.compile(r"[ \t]*[^ \t]+|[ \t]+$")
+
+
 @dataclass(frozen=True)
 class SendResult:
     id: str
     thread_id: str
 
 
+@lru_cache(maxsize=512)
 def _strip_re(subject: str) -> str:
+    # Cached: replies within a thread keep hitting the same subject line.
     s = subject.strip()
     if not s:
         return s
-    # Collapse multiple Re:
-    s2 = re.sub(r"^(?:(?:re|fw|fwd)\s*:\s*)+", "", s, flags=re.IGNORECASE).strip()
-    return f"Re: {s2}" if s2 else "Re:"
+    # Collapse multiple Re:/Fw:/Fwd: (case-insensitive, optional spaces around the colon)
+    while True:
+        head = s[:3].lower()
+        for prefix in _REPLY_PREFIXES:
+            if head.startswith(prefix):
+                rest = s[len(prefix):].lstrip()
+                if rest.startswith(":"):
+                    s = rest[1:].lstrip()
+                    break
+        else:
+            break
+    return f"Re: {s}" if s else "Re:"
+
+
+def _bare_address(value: str) -> Optional[str]:
+    # Most Reply-To/From values are already a bare "name@host"; only parse display-name forms.
+    v = value.strip()
+    if "@" not in v or any(c in v for c in '<"(, \t'):
+        return None
+    return v
+
+
+def _fold(name: str, value: str) -> Optional[str]:
+    # Fold long ASCII values (e.g. References in a long thread) by inserting CRLF before existing
+    # whitespace, so unfolding restores the value exactly. None if a token is too long to fold.
+    out = []
+    line = f"{name}: "
+    for token in _FOLD_TOKEN_RE.findall(value):
+        # Every token after the first starts with whitespace, so a break may go before it.
+        if line.strip() != f"{name}:" and len(line) + len(token) > _FOLD_WIDTH:
+            out.append(line)
+            line = ""
+        line += token
+        if len(line) > _MAX_LINE_BYTES:
+            return None
+    out.append(line)
+    return "\r\n".join(out)
+
 
+def _header(name: str, value: str) -> str:
+    # No header injection: a value can never start a new header line.
+    v = value.replace("\r", "").replace("\n", "")
+    if v.isascii():
+        if len(name) + 2 + len(v) <= _FOLD_WIDTH:
+            return f"{name}: {v}"
+        folded = _fold(name, v)
+        if folded is not None:
+            return folded
+    # RFC 2047 encoded-words (with folding) for non-ASCII, e.g. accented subjects, and for ASCII
+    # tokens too long to fold at whitespace.
+    return f"{name}: " + Header(v, "utf-8", header_name=name).encode(linesep="\r\n")
 
-def send_reply(service, original: EmailFull, reply_text: str) -> SendResult:
+
+def _build_raw(to: str, subject: str, in_reply_to: str, references: str, body: str) -> bytes:
+    """
+    Minimal RFC 5322 text/plain message for the Gmail API `raw` field.
+    """
+    lines = [_header("To", to), _header("Subject", subject)]
+    if in_reply_to:
+        lines.append(_header("In-Reply-To", in_reply_to))
+        lines.append(_header("References", references))
+    text = body.replace("\r\n", "\n").replace("\r", "\n").encode("utf-8")
+    if any(len(line) > _MAX_LINE_BYTES for line in text.split(b"\n")):
+        # 8bit can't carry over-long lines; quoted-printable re-wraps them with soft breaks.
+        cte = "quoted-printable"
+        text = quopri.encodestring(text)
+    else:
+        cte = "8bit"
+    lines += [
+        "MIME-Version: 1.0",
+        'Content-Type: text/plain; charset="utf-8"',
+        f"Content-Transfer-Encoding: {cte}",
+    ]
+    head = "\r\n".join(lines) + "\r\n\r\n"
+    return head.encode("ascii") + text.replace(b"\n", b"\r\n")
+
+
+def _messages_resource(service):
+    return service.users().messages()
+
+
+def send_reply(service, original: EmailFull, reply_text: str, messages=None) -> SendResult:
+    """
+    Send `reply_text` as a threaded reply to `original`.
+
+    Callers sending several replies can pass `messages=service.users().messages()` once to skip
+    rebuilding the discovery-backed resource chain on each send.
+    """
     # Prefer Reply-To (if present), otherwise From:
     reply_to = original.reply_to or original.from_
-    _, addr = parseaddr(reply_to)
-    to_addr = addr or reply_to
-
-    msg = MIMEText(reply_text, _charset="utf-8")
-    msg["To"] = to_addr
-    msg["Subject"] = _strip_re(original.subject)
+    to_addr = _bare_address(reply_to)
+    if to_addr is None:
+        _, addr = parseaddr(reply_to)
+        to_addr = addr or reply_to
 
+    in_reply_to = original.message_id
+    references = ""
     if original.message_id:
-        msg["In-Reply-To"] = original.message_id
-        msg["References"] = (original.references + " " + original.message_id).strip() if original.references else original.message_id
-
-    raw = base64.urlsafe_b64encode(msg.as_bytes()).decode("utf-8")
-    sent = (
-        service.users()
-        .messages()
-        .send(userId="me", body={"raw": raw, "threadId": original.thread_id})
-        .execute()
-    )
+        references = (original.references + " " + original.message_id).strip() if original.references else original.message_id
+
+    raw_bytes = _build_raw(to_addr, _strip_re(original.subject), in_reply_to, references, reply_text)
+    raw = base64.urlsafe_b64encode(raw_bytes).decode("ascii")
+    if messages is None:
+        messages = _messages_resource(service)
+    sent = messages.send(userId="me", body={"raw": raw, "threadId": original.thread_id}).execute()
     return SendResult(id=sent.get("id", ""), thread_id=sent.get("threadId", ""))
 
@@ -1,31 +1,72 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import queue
 import re
+import threading
 from dataclasses import dataclass
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+
+try:
+    import orjson  # type: ignore
+
+    def _dumps(obj: Any) -> str:
+        # OPT_NON_STR_KEYS: coerce int/etc. dict keys to strings like json.dumps does.
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+except ImportError:  # optional speedup; stdlib json is the fallback
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
 
 _TOKEN_RE = re.compile(r"(ya29\.[0-9A-Za-z\-_]+|1//[0-9A-Za-z\-_]+)")
+_REDACTED_KEYS = frozenset({"access_token", "refresh_token"})
+_MAX_STR_LEN = 2000
+_TRUNC = "...[TRUNCATED]"
 
 
 def _redact(value: Any) -> Any:
     if value is None:
         return None
     if isinstance(value, str):
-        v = _TOKEN_RE.sub("[REDACTED_TOKEN]", value)
+        # Substring guard: only enter the regex engine if a token prefix is present at all.
+        v = _TOKEN_RE.sub("[REDACTED_TOKEN]", value) if ("ya29." in value or "1//" in value) else value
         # avoid dumping huge content (emails/audio)
-        if len(v) > 2000:
-            return v[:2000] + "...[TRUNCATED]"
-        return v
+        return v if len(v) <= _MAX_STR_LEN else v[:_MAX_STR_LEN] + _TRUNC
     if isinstance(value, dict):
-        return {k: _redact(v) for k, v in value.items() if k.lower() not in {"access_token", "refresh_token"}}
+        # str(k): payloads may carry int/etc. keys; the encoders turn those into strings.
+        return {k: _redact(v) for k, v in value.items() if str(k).lower() not in _REDACTED_KEYS}
     if isinstance(value, list):
         return [_redact(v) for v in value]
     return value
 
 
+_FORMATTER = logging.Formatter("[%(levelname)s] %(message)s")
+
+# Records are enqueued on the caller's thread and written to stderr by one background listener.
+_LOG_Q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        handler = logging.StreamHandler()
+        handler.setFormatter(_FORMATTER)
+        _listener = QueueListener(_LOG_Q, handler, respect_handler_level=True)
+        _listener.start()
+        # Drain anything still queued before the interpreter exits.
+        atexit.register(_listener.stop)
+
+
 @dataclass(frozen=True)
 class Logger:
     name: str = "dior"
@@ -35,15 +76,13 @@ class Logger:
         logger = logging.getLogger(self.name)
         logger.setLevel(self.level)
         if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter("[%(levelname)s] %(message)s")
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
+            _ensure_listener()
+            logger.addHandler(QueueHandler(_LOG_Q))
         logger.propagate = False
         return logger
 
 
 def log_event(logger: logging.Logger, event: str, **fields: Any) -> None:
     payload = {"event": event, **fields}
-    logger.info(json.dumps(_redact(payload), ensure_ascii=False))
+    logger.info(_dumps(_redact(payload)))
 
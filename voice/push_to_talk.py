@@ -1,15 +1,31 @@
 from __future__ import annotations
 
-import queue
-import time
+import threading
 import wave
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import numpy as np
 
 
+# Frames per blocking read (~64 ms at 16 kHz).
+_BLOCK_FRAMES = 1024
+
+_WHISPER_SAMPLE_RATE = 16000
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+@lru_cache(maxsize=1)
+def _audio_deps():
+    # Imported on first use (PortAudio init is slow), then reused on every push-to-talk.
+    import keyboard
+    import sounddevice as sd
+
+    return sd, keyboard
+
+
 @dataclass(frozen=True)
 class AudioCaptureConfig:
     sample_rate: int = 16000
@@ -20,6 +36,11 @@ class AudioCaptureConfig:
     # Keyboard key used for push-to-talk (e.g. "space").
     push_key: str = "space"
 
+    def __post_init__(self) -> None:
+        # Captured blocks are written to the WAV as-is, so PortAudio must already deliver 16-bit PCM.
+        if self.dtype != "int16":
+            raise ValueError(f"AudioCaptureConfig.dtype must be 'int16' (16-bit PCM WAV), got {self.dtype!r}")
+
 
 class PushToTalk:
     """
@@ -30,77 +51,102 @@ class PushToTalk:
 
     def __init__(self, cfg: AudioCaptureConfig) -> None:
         self.cfg = cfg
+        # float32 [-1, 1) mono copy of the last recording, ready for Whisper (16 kHz mono only).
+        self.last_audio: Optional[np.ndarray] = None
 
     def record_while_held(
-        self, out_wav_path: Path, key: Optional[str] = None, max_seconds: int = 20
+        self,
+        out_wav_path: Path,
+        key: Optional[str] = None,
+        max_seconds: int = 20,
+        on_audio: Optional[Callable[[np.ndarray], None]] = None,
     ) -> bool:
         """
         Record audio while a keyboard key is held down.
 
         Returns True if audio was captured and written to `out_wav_path`,
         otherwise False (e.g. no key press detected or no audio frames).
+        On success `last_audio` also holds the samples as float32 when the format suits Whisper.
+        `on_audio`, if given, is called after every block with a view of the float32 samples so far
+        (same format condition); it runs on the capture loop, so it must return immediately.
         """
-        import sounddevice as sd
-        import keyboard
+        sd, keyboard = _audio_deps()
 
         # Resolve which key to use for push-to-talk.
         effective_key = (key or self.cfg.push_key).lower()
 
         out_wav_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Phase 1: wait briefly for the key to be pressed.
+        # Phase 1: wait briefly for the key to be pressed (keyboard hook + Event, no polling).
         wait_timeout = 5.0
-        wait_start = time.time()
         print(
             f"Hold {effective_key.upper()} to talk (or wait for text input prompt)..."
         )
-        while time.time() - wait_start < wait_timeout:
-            if keyboard.is_pressed(effective_key):
-                break
-            time.sleep(0.05)
-        else:
-            # No key press detected within the timeout – fall back to text.
-            return False
+        pressed = threading.Event()
+        press_hook = keyboard.on_press_key(effective_key, lambda _e: pressed.set(), suppress=False)
+        try:
+            if not keyboard.is_pressed(effective_key) and not pressed.wait(wait_timeout):
+                # No key press detected within the timeout – fall back to text.
+                return False
+        finally:
+            keyboard.unhook_key(press_hook)
 
         # Phase 2: record while the key is held (up to max_seconds/config cap).
-        q: "queue.Queue[np.ndarray]" = queue.Queue()
-
-        def callback(indata, frames, time_info, status):  # noqa: ANN001
-            if status:
-                return
-            q.put(indata.copy())
-
+        # Each blocking read is appended to the WAV immediately: no capture buffer, no final copy.
         print("Recording... release key to send.")
 
-        start_t = time.time()
-        frames: list[np.ndarray] = []
-        max_duration = min(self.cfg.duration_seconds, max_seconds)
-
-        with sd.InputStream(
-            samplerate=self.cfg.sample_rate,
-            channels=self.cfg.channels,
-            dtype=self.cfg.dtype,
-            callback=callback,
-        ):
-            while keyboard.is_pressed(effective_key) and time.time() - start_t < max_duration:
-                try:
-                    frames.append(q.get(timeout=0.25))
-                except queue.Empty:
-                    pass
-
-        if not frames:
-            return False
-
-        audio = np.concatenate(frames, axis=0)
-        # Ensure int16 PCM
-        if audio.dtype != np.int16:
-            audio = (audio * 32767.0).astype(np.int16)
-
-        with wave.open(str(out_wav_path), "wb") as wf:
-            wf.setnchannels(self.cfg.channels)
-            wf.setsampwidth(2)  # int16
-            wf.setframerate(self.cfg.sample_rate)
-            wf.writeframes(audio.tobytes())
+        # Frame budget replaces a wall-clock deadline: exact, and no clock reads in the hold loop.
+        max_frames = self.cfg.sample_rate * min(self.cfg.duration_seconds, max_seconds)
+        written = 0
+        # Whisper ingests float32 @ 16 kHz mono; fill that alongside the WAV so STT needn't re-read it.
+        self.last_audio = None
+        audio = (
+            np.empty(max_frames, dtype=np.float32)
+            if self.cfg.sample_rate == _WHISPER_SAMPLE_RATE and self.cfg.channels == 1
+            else None
+        )
 
+        released = threading.Event()
+        release_hook = keyboard.on_release_key(effective_key, lambda _e: released.set(), suppress=False)
+        try:
+            if not keyboard.is_pressed(effective_key):
+                # Released before the hook was installed.
+                released.set()
+            with wave.open(str(out_wav_path), "wb") as wf:
+                # Header params first: if the stream below fails to open, closing the WAV must not
+                # raise over PortAudio's error.
+                wf.setnchannels(self.cfg.channels)
+                wf.setsampwidth(2)  # int16
+                wf.setframerate(self.cfg.sample_rate)
+                with sd.InputStream(
+                    samplerate=self.cfg.sample_rate,
+                    channels=self.cfg.channels,
+                    dtype=self.cfg.dtype,
+                    blocksize=_BLOCK_FRAMES,
+                    # Blocking mode: PortAudio's C-side lock-free ring sits between the audio thread and
+                    # read(); no Python callback, queue or GIL on the realtime path. "high" latency
+                    # sizes that ring generously so a slow WAV write can't overrun it.
+                    latency="high",
+                ) as stream:
+                    while not released.is_set() and written < max_frames:
+                        n = min(_BLOCK_FRAMES, max_frames - written)
+                        data, _overflowed = stream.read(n)
+                        wf.writeframes(data)
+                        if audio is not None:
+                            np.multiply(data[:, 0], _INT16_SCALE, out=audio[written : written + n])
+                        written += n
+                        if audio is not None and on_audio is not None:
+                            on_audio(audio[:written])
+        except BaseException:
+            # Don't leave a partial/empty WAV behind when capture fails.
+            out_wav_path.unlink(missing_ok=True)
+            raise
+        finally:
+            keyboard.unhook_key(release_hook)
+
+        if not written:
+            out_wav_path.unlink(missing_ok=True)
+            return False
+        if audio is not None:
+            self.last_audio = audio[:written]
         return True
-
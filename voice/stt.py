@@ -1,7 +1,27 @@
 from __future__ import annotations
 
+import os
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# faster-whisper's expected input rate for in-memory audio.
+_SAMPLE_RATE = 16000
+
+# Two CTranslate2 replicas (final pass + one live partial), each with half the cores.
+_NUM_WORKERS = 2
+
+
+@lru_cache(maxsize=1)
+def _whisper_cls():
+    from faster_whisper import WhisperModel  # type: ignore
+
+    return WhisperModel
 
 
 @dataclass(frozen=True)
@@ -18,18 +38,37 @@ class SpeechToText:
     that faster-whisper needs to fetch; for strict offline usage, point `model` to a local directory.
     """
 
-    def __init__(self, model: str) -> None:
+    def __init__(self, model: str, compute_type: str = "int8") -> None:
         self.model = model
+        self.compute_type = compute_type
         self._whisper = None
+        # Serializes loading (startup preload vs. first transcription) so only one model is built.
+        self._load_lock = threading.Lock()
+        # At most one live partial in flight, even one abandoned by a previous turn.
+        self._partial_slot = threading.Lock()
 
     def try_load(self) -> bool:
+        if self._whisper is not None:
+            return True
+        with self._load_lock:
+            return self._load()
+
+    def _load(self) -> bool:
         if self._whisper is not None:
             return True
         try:
-            from faster_whisper import WhisperModel  # type: ignore
+            WhisperModel = _whisper_cls()
 
             # device auto: uses CUDA if available
-            self._whisper = WhisperModel(self.model, device="auto", compute_type="int8")
+            self._whisper = WhisperModel(
+                self.model,
+                device="auto",
+                compute_type=self.compute_type,
+                # The final pass never queues behind a live partial, and together they don't
+                # oversubscribe the cores.
+                cpu_threads=max(1, (os.cpu_count() or 4) // _NUM_WORKERS),
+                num_workers=_NUM_WORKERS,
+            )
             return True
         except Exception as e:
             # Surface a basic hint in the terminal if the model cannot be loaded.
@@ -37,10 +76,119 @@ class SpeechToText:
             self._whisper = None
             return False
 
-    def transcribe_wav(self, wav_path: str) -> SttResult:
+    def transcribe_wav(self, wav_path: str, audio: Optional[np.ndarray] = None) -> SttResult:
+        """
+        Transcribe `wav_path`, or `audio` (float32 mono @ 16 kHz) if given, skipping the WAV re-read.
+        """
+        return self._transcribe(audio if audio is not None else wav_path)
+
+    def transcribe_array(self, audio: np.ndarray) -> SttResult:
+        """Transcribe float32 mono samples @ 16 kHz."""
+        return self._transcribe(audio)
+
+    def try_transcribe_partial(self, audio: np.ndarray) -> Optional[SttResult]:
+        """
+        Like `transcribe_array`, but returns None instead of waiting if another partial is still running.
+        """
+        if not self._partial_slot.acquire(blocking=False):
+            return None
+        try:
+            return self._transcribe(audio)
+        finally:
+            self._partial_slot.release()
+
+    def _transcribe(self, source: Any) -> SttResult:
         if not self.try_load():
             return SttResult(text="", used_model=False)
-        segments, _info = self._whisper.transcribe(wav_path, vad_filter=True)
-        text = " ".join((s.text or "").strip() for s in segments).strip()
-        return SttResult(text=text, used_model=True)
+        # Safe to call from several threads: CTranslate2 runs each call on one of `num_workers` replicas.
+        # VAD drops silence before the encoder; 300 ms gaps split push-to-talk pauses tightly.
+        segments, _info = self._whisper.transcribe(
+            source,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=300),
+            # Short single-utterance commands: greedy decoding, no cross-window context or timestamps.
+            beam_size=1,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        # Strip then drop empties so blank segments can't leave double spaces.
+        parts = [t for t in ((s.text or "").strip() for s in segments) if t]
+        return SttResult(text=" ".join(parts), used_model=True)
+
+
+class StreamingTranscriber:
+    """
+    Live partial transcripts while push-to-talk is held.
+
+    `feed` receives the growing recording (float32 mono @ 16 kHz) from the capture loop; a worker
+    thread re-transcribes the latest `window_seconds` every `interval` seconds and reports the text
+    via `on_partial`. `finish` runs the final pass over the whole clip, reusing a partial that already
+    covers all of it; it never waits on a partial that doesn't.
+    """
+
+    def __init__(
+        self,
+        stt: SpeechToText,
+        on_partial: Callable[[str], None],
+        interval: float = 1.0,
+        window_seconds: float = 30.0,
+    ) -> None:
+        self.stt = stt
+        self.on_partial = on_partial
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self._latest: Optional[np.ndarray] = None
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        # Sample count of the partial being transcribed (0 = idle), and (count, result) of the last one.
+        self._inflight_len = 0
+        self._done: Optional[tuple[int, SttResult]] = None
+
+    def feed(self, audio: np.ndarray) -> None:
+        # Called once per capture block: publish the view and return, never block the capture loop.
+        self._latest = audio
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="stt-partial", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        window = int(self.window_seconds * _SAMPLE_RATE)
+        last_len = 0
+        while not self._stop.wait(self.interval):
+            audio = self._latest
+            if audio is None or len(audio) == last_len:
+                continue
+            last_len = len(audio)
+            # Only a clip that fits the window can stand in for the final pass.
+            self._inflight_len = last_len if last_len <= window else 0
+            res = self.stt.try_transcribe_partial(audio[-window:])
+            if res is None:
+                # A partial abandoned by the previous turn still holds the slot; try next tick.
+                self._inflight_len = 0
+                last_len = 0
+                continue
+            if self._inflight_len:
+                self._done = (self._inflight_len, res)
+            self._inflight_len = 0
+            if not res.used_model:
+                # Whisper failed to load (already reported once); don't retry every interval.
+                return
+            if res.text and not self._stop.is_set():
+                self.on_partial(res.text)
+
+    def stop(self) -> None:
+        # Don't join: an in-flight partial finishes (or is discarded) in the background.
+        self._stop.set()
 
+    def finish(self, wav_path: str, audio: Optional[np.ndarray] = None) -> SttResult:
+        self.stop()
+        if audio is not None:
+            n = len(audio)
+            worker = self._worker
+            if worker is not None and self._inflight_len == n:
+                # The running partial already covers the whole clip: its result is the final one.
+                worker.join()
+            done = self._done
+            if done is not None and done[0] == n:
+                return done[1]
+        return self.stt.transcribe_wav(wav_path, audio=audio)